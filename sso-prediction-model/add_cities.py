@@ -5,37 +5,51 @@ Uses OpenStreetMap Nominatim API (free, 1 request/second rate limit).
 """
 
 import pandas as pd
-import urllib.request
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pv
+import aiohttp
+import asyncio
+import diskcache
 import json
-import time
 import os
 
 # Configuration
 CSV_PATH = '/Users/jeanyi/Documents/Sewer Pipes Project/sso-prediction-model/outputs/model_results.csv'
-CACHE_PATH = '/Users/jeanyi/Documents/Sewer Pipes Project/city_cache.json'
+CACHE_DIR = '/Users/jeanyi/Documents/Sewer Pipes Project/city_cache'
+CACHE_PATH = '/Users/jeanyi/Documents/Sewer Pipes Project/city_cache.json'  # JSON export
 TOP_N = 100  # Only geocode top N risk locations
+MAX_CONCURRENT = 1  # Nominatim usage policy: no parallel requests
+RATE_LIMIT_SECONDS = 1.0  # Nominatim usage policy: max 1 request/second
+HEADERS = {'User-Agent': 'LACountySewerProject/1.0 (educational research)'}
+COORD_PRECISION = 4  # Decimal places (~11 m); nearby points share one lookup
 
 def load_cache():
-    """Load cached geocoding results"""
-    if os.path.exists(CACHE_PATH):
+    """Open the on-disk geocoding cache, seeding it from the JSON export on first use"""
+    cache = diskcache.Cache(CACHE_DIR)
+    if len(cache) == 0 and os.path.exists(CACHE_PATH):
         with open(CACHE_PATH, 'r') as f:
-            return json.load(f)
-    return {}
+            with cache.transact():
+                for key, city in json.load(f).items():
+                    cache[key] = city
+    return cache
 
-def save_cache(cache):
-    """Save cache to disk"""
+def export_cache(cache):
+    """Export cache to JSON for downstream tooling"""
     with open(CACHE_PATH, 'w') as f:
         json.dump(cache, f, indent=2)
 
-def reverse_geocode(lat, lon):
+def rounded_key(lat, lon):
+    """Cache key for coordinates rounded to COORD_PRECISION decimal places"""
+    return f"{round(float(lat), COORD_PRECISION)},{round(float(lon), COORD_PRECISION)}"
+
+async def reverse_geocode(session, lat, lon):
     """Get city/area name from coordinates using Nominatim API"""
     url = f"https://nominatim.openstreetmap.org/reverse?lat={lat}&lon={lon}&format=json&zoom=14&addressdetails=1"
-    headers = {'User-Agent': 'LACountySewerProject/1.0 (educational research)'}
 
     try:
-        req = urllib.request.Request(url, headers=headers)
-        with urllib.request.urlopen(req, timeout=10) as response:
-            data = json.loads(response.read().decode())
+        async with session.get(url) as response:
+            data = json.loads(await response.text())
             address = data.get('address', {})
 
             # Check for incorporated city first
@@ -66,6 +80,48 @@ def reverse_geocode(lat, lon):
         print(f"  Error geocoding {lat},{lon}: {e}")
         return ''
 
+async def geocode_all(to_geocode, cache):
+    """
+    Geocode coordinates concurrently while respecting the Nominatim rate limit.
+
+    Each result is committed to the disk cache as soon as it arrives, so an
+    interrupted run loses nothing and no periodic checkpoint is needed.
+    Results are stored under both the exact and the rounded coordinates, and
+    points that round to the same key share a single in-flight request.
+    The semaphore bounds in-flight requests and each slot is held for
+    RATE_LIMIT_SECONDS, so DNS/TLS setup and response parsing overlap with
+    the wait instead of adding to it. One session owns the connection pool,
+    so the keep-alive socket (and its TLS handshake and DNS lookup) is
+    reused for every request instead of reconnecting per call.
+    """
+    sem = asyncio.Semaphore(MAX_CONCURRENT)
+    connector = aiohttp.TCPConnector(limit=MAX_CONCURRENT, keepalive_timeout=60, ttl_dns_cache=300)
+    timeout = aiohttp.ClientTimeout(total=10)
+    lookups = {}  # Rounded key -> request task, shared by nearby points
+    done = 0
+
+    async with aiohttp.ClientSession(connector=connector, headers=HEADERS, timeout=timeout) as session:
+        async def fetch(lat, lon):
+            async with sem:
+                city = await reverse_geocode(session, lat, lon)
+                await asyncio.sleep(RATE_LIMIT_SECONDS)  # Rate limit
+            return city
+
+        async def geocode_one(lat, lon):
+            nonlocal done
+            key = rounded_key(lat, lon)
+            if key not in lookups:
+                lookups[key] = asyncio.ensure_future(fetch(lat, lon))
+            city = await lookups[key]
+
+            cache[key] = city
+            cache[f"{lat},{lon}"] = city
+            done += 1
+            print(f"  [{done}/{len(to_geocode)}] {lat:.4f}, {lon:.4f} → {city}")
+
+        tasks = [geocode_one(lat, lon) for lat, lon in to_geocode]
+        await asyncio.gather(*tasks)
+
 def main():
     print("Loading CSV with risk scores...")
     df = pd.read_csv(CSV_PATH)
@@ -75,9 +131,11 @@ def main():
     if 'city' not in df.columns:
         df['city'] = ''
 
-    # Get top N by risk score
-    df_sorted = df.sort_values('risk_score', ascending=False)
-    top_n = df_sorted.head(TOP_N)
+    # Get top N by risk score (partial selection, then sort only those N)
+    scores = df['risk_score'].to_numpy()
+    k = min(TOP_N, len(df))
+    idx = np.argpartition(-scores, k - 1)[:k] if k > 0 else np.empty(0, dtype=np.intp)
+    top_n = df.iloc[idx[np.argsort(-scores[idx], kind='stable')]]
 
     print(f"\nGeocoding top {TOP_N} risk locations...")
     print(f"Risk score range: {top_n['risk_score'].min():.1f} - {top_n['risk_score'].max():.1f}")
@@ -90,11 +148,16 @@ def main():
     coords = top_n[['latitude', 'longitude']].drop_duplicates().dropna()
     print(f"Unique coordinates in top {TOP_N}: {len(coords)}")
 
-    # Filter out already cached
+    # Filter out already cached, reusing results for nearby cached points
     to_geocode = []
     for _, row in coords.iterrows():
         key = f"{row['latitude']},{row['longitude']}"
-        if key not in cache:
+        if key in cache:
+            continue
+        nearby_key = rounded_key(row['latitude'], row['longitude'])
+        if nearby_key in cache:
+            cache[key] = cache[nearby_key]
+        else:
             to_geocode.append((row['latitude'], row['longitude']))
 
     print(f"New coordinates to geocode: {len(to_geocode)}")
@@ -103,34 +166,22 @@ def main():
         print(f"\nEstimated time: ~{len(to_geocode)} seconds")
         print("Starting geocoding...\n")
 
-        for i, (lat, lon) in enumerate(to_geocode):
-            key = f"{lat},{lon}"
-            city = reverse_geocode(lat, lon)
-            cache[key] = city
-            print(f"  [{i+1}/{len(to_geocode)}] {lat:.4f}, {lon:.4f} → {city}")
-
-            # Save cache every 10 requests
-            if (i + 1) % 10 == 0:
-                save_cache(cache)
-
-            time.sleep(1.1)  # Rate limit
+        asyncio.run(geocode_all(to_geocode, cache))
 
-    # Save final cache
-    save_cache(cache)
+    # Materialize the cache once so the per-row lookups below hit a plain dict
+    cache_dict = {key: cache[key] for key in cache}
+    cache.close()
+    export_cache(cache_dict)
 
     # Update city column for ALL rows (using cache)
+    # Missing coordinates become 'nan,nan' keys, which never hit the cache
     print("\nUpdating city column in CSV...")
-    def get_city(row):
-        if pd.isna(row['latitude']) or pd.isna(row['longitude']):
-            return ''
-        key = f"{row['latitude']},{row['longitude']}"
-        return cache.get(key, '')
-
-    df['city'] = df.apply(get_city, axis=1)
+    keys = df['latitude'].astype(str) + ',' + df['longitude'].astype(str)
+    df['city'] = keys.map(cache_dict).fillna('')
 
     # Save updated CSV
     print(f"Saving to {CSV_PATH}...")
-    df.to_csv(CSV_PATH, index=False)
+    pv.write_csv(pa.Table.from_pandas(df, preserve_index=False), CSV_PATH)
 
     # Print summary
     top_cities = df.head(TOP_N)['city'].value_counts()
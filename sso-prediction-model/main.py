@@ -6,15 +6,15 @@ Runs preprocessing, validation, and prediction generation in sequence.
 import os
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 # Add src directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
-from src.preprocess import preprocess_data
-from src.model import validate_risk_scoring, save_metrics
+from src.preprocess import preprocess_data, add_age_band
+from src.model import compute_breakdowns, validate_risk_scoring, save_metrics
 from src.predict import generate_predictions, save_results, generate_feature_importance
-import pandas as pd
 
 
 def print_header(title):
@@ -36,7 +36,7 @@ def main():
     # Define paths
     base_dir = os.path.dirname(os.path.abspath(__file__))
     input_file = os.path.join(base_dir, "data", "sso_la_county_analyzed.csv")
-    preprocessed_file = os.path.join(base_dir, "data", "preprocessed_data.csv")
+    preprocessed_file = os.path.join(base_dir, "data", "preprocessed_data.parquet")
     results_file = os.path.join(base_dir, "outputs", "model_results.csv")
     metrics_file = os.path.join(base_dir, "outputs", "model_metrics.json")
     importance_file = os.path.join(base_dir, "outputs", "feature_importance.csv")
@@ -47,30 +47,40 @@ def main():
         print("Please ensure sso_la_county_analyzed.csv is in the data/ directory")
         return 1
 
+    # Background thread for output writes that nothing downstream reads
+    io_pool = ThreadPoolExecutor(max_workers=1)
+
     try:
+        # Feature importance has no data dependency, so write it while the
+        # pipeline runs
+        importance_df = generate_feature_importance()
+        os.makedirs(os.path.dirname(importance_file), exist_ok=True)
+        importance_future = io_pool.submit(importance_df.to_csv, importance_file, index=False)
+
         # Step 1: Preprocessing
         print_header("STEP 1/3: DATA PREPROCESSING")
-        df_original = pd.read_csv(input_file)
-        total_records = len(df_original)
-
-        df_preprocessed = preprocess_data(input_file, preprocessed_file)
+        df_preprocessed, total_records = preprocess_data(input_file, preprocessed_file)
         records_scored = len(df_preprocessed)
         records_missing = total_records - records_scored
 
+        # Shared age bands and material/age/cause aggregations for
+        # validation and predictions
+        add_age_band(df_preprocessed)
+        breakdowns = compute_breakdowns(df_preprocessed)
+
         # Step 2: Model Validation
         print_header("STEP 2/3: MODEL VALIDATION")
-        metrics = validate_risk_scoring(df_preprocessed)
+        metrics = validate_risk_scoring(df_preprocessed, breakdowns)
         save_metrics(metrics, metrics_file, total_records, records_scored, records_missing)
 
         # Step 3: Generate Predictions
         print_header("STEP 3/3: GENERATE PREDICTIONS")
-        df_results = generate_predictions(df_preprocessed)
+        df_results = generate_predictions(df_preprocessed, breakdowns)
         save_results(df_results, results_file)
 
         # Save feature importance
         print(f"\nSaving feature importance to: {importance_file}")
-        importance_df = generate_feature_importance()
-        importance_df.to_csv(importance_file, index=False)
+        importance_future.result()
         print("   ✓ Feature importance saved")
 
         # Final Summary
@@ -110,6 +120,9 @@ def main():
         traceback.print_exc()
         return 1
 
+    finally:
+        io_pool.shutdown()
+
 
 if __name__ == "__main__":
     exit_code = main()
@@ -0,0 +1,58 @@
+"""
+Compiled scoring kernel for the preprocessing step.
+
+Fuses age score, material score lookup, weighted risk score and risk
+category into a single pass over the rows. Formulas match
+calculate_age_scores(), calculate_material_scores(), calculate_risk_scores()
+and calculate_risk_categories() in preprocess.py, which remain the NumPy
+reference path used when numba is not installed.
+"""
+
+import numpy as np
+from numba import njit, prange
+
+
+@njit(parallel=True, cache=True)
+def score_all(ages, mat_codes, mat_score_lut):
+    """
+    Score every row in one parallel loop.
+
+    Args:
+        ages: float32 array of pipe ages in years
+        mat_codes: Integer categorical codes of the standardized materials
+            (-1 for missing reads the last LUT entry)
+        mat_score_lut: int8 array of material scores indexed by code
+
+    Returns:
+        Tuple of (age_score float32, material_score int8, risk_score float32,
+        risk_category_code int8) arrays
+    """
+    n = ages.shape[0]
+    age_scores = np.empty(n, dtype=np.float32)
+    material_scores = np.empty(n, dtype=np.int8)
+    risk_scores = np.empty(n, dtype=np.float32)
+    category_codes = np.empty(n, dtype=np.int8)
+
+    for i in prange(n):
+        age = max(ages[i], np.float32(0))
+        age_score = min(np.float32(20) + (age / np.float32(100)) ** np.float32(1.8) * np.float32(80),
+                        np.float32(100))
+        material_score = mat_score_lut[mat_codes[i]]
+        risk_score = age_score * np.float32(0.80) + np.float32(material_score) * np.float32(0.20)
+
+        # Right-inclusive bins: <=40 Low, <=60 Medium, <=80 High, else Critical
+        if risk_score <= 40:
+            code = 0
+        elif risk_score <= 60:
+            code = 1
+        elif risk_score <= 80:
+            code = 2
+        else:
+            code = 3
+
+        age_scores[i] = age_score
+        material_scores[i] = material_score
+        risk_scores[i] = risk_score
+        category_codes[i] = code
+
+    return age_scores, material_scores, risk_scores, category_codes
@@ -7,19 +7,118 @@ import pandas as pd
 import numpy as np
 import json
 import os
-from preprocess import preprocess_data
+from dataclasses import dataclass
+from typing import Optional
+from preprocess import preprocess_data, load_preprocessed, count_records, add_age_band, AGE_BAND_LABELS
 
 
-def validate_risk_scoring(df):
+@dataclass
+class Breakdowns:
+    """Risk score aggregations shared by validation and prediction."""
+    material_col: str
+    material_stats: pd.DataFrame
+    age_band_stats: pd.DataFrame
+    cause_stats: Optional[pd.DataFrame]
+
+
+def pearson_corr(x, y):
+    """
+    Pearson correlation of two equal-length float arrays.
+
+    Centers both arrays and takes three dot products, avoiding the
+    intermediate Series and covariance-matrix allocations of Series.corr
+    and np.corrcoef.
+
+    Args:
+        x: 1-D float64 array without NaN
+        y: 1-D float64 array without NaN
+
+    Returns:
+        Correlation coefficient (NaN if either array is constant)
+    """
+    x = x - x.mean()
+    y = y - y.mean()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return float((x @ y) / np.sqrt((x @ x) * (y @ y)))
+
+
+def group_mean_count(keys, values):
+    """
+    Mean and count of values per key using np.bincount.
+
+    Equivalent to values.groupby(keys).agg(['mean', 'count']) for a numeric
+    column, but aggregates with two C passes over the factorized codes
+    instead of pandas' general groupby machinery. Categorical keys keep
+    all their categories, like groupby(observed=False).
+
+    Args:
+        keys: Series of group keys (NaN keys are dropped)
+        values: Series of numeric values aligned with keys
+
+    Returns:
+        DataFrame with 'mean' and 'count' columns indexed by key
+    """
+    if isinstance(keys.dtype, pd.CategoricalDtype):
+        codes = keys.cat.codes.to_numpy()
+        uniques = pd.CategoricalIndex(keys.cat.categories, dtype=keys.dtype)
+    else:
+        codes, uniques = pd.factorize(keys, sort=True)
+
+    values = values.to_numpy(dtype=np.float64)
+    valid = (codes >= 0) & ~np.isnan(values)
+    sums = np.bincount(codes[valid], weights=values[valid], minlength=len(uniques))
+    counts = np.bincount(codes[valid], minlength=len(uniques))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        means = sums / counts
+
+    return pd.DataFrame({'mean': means, 'count': counts}, index=pd.Index(uniques, name=keys.name))
+
+
+def compute_breakdowns(df):
+    """
+    Compute risk score breakdowns by material, age band, and spill cause.
+
+    Computed once per pipeline run and passed to both validate_risk_scoring()
+    and generate_predictions() so neither repeats the groupby work.
+
+    Args:
+        df: Preprocessed DataFrame with risk scores. Uses its age_band
+            column, which is added first if missing.
+
+    Returns:
+        Breakdowns with mean/count tables, sorted by mean risk for
+        material and cause and in band order for age
+    """
+    if 'age_band' not in df.columns:
+        add_age_band(df)
+
+    # Use standardized material names if available
+    material_col = 'pipe_material_standardized' if 'pipe_material_standardized' in df.columns else 'pipe_material'
+    material_stats = group_mean_count(df[material_col], df['risk_score']).sort_values('mean', ascending=False)
+
+    age_band_stats = group_mean_count(df['age_band'], df['risk_score'])
+
+    cause_stats = None
+    if 'spill_cause' in df.columns:
+        cause_stats = group_mean_count(df['spill_cause'], df['risk_score']).sort_values('mean', ascending=False)
+
+    return Breakdowns(material_col, material_stats, age_band_stats, cause_stats)
+
+
+def validate_risk_scoring(df, breakdowns=None):
     """
     Validate risk scores by correlating with severity indicators.
 
     Args:
         df: Preprocessed DataFrame with risk scores
+        breakdowns: Precomputed Breakdowns for df (computed if not given)
 
     Returns:
         Dictionary of validation metrics
     """
+    if breakdowns is None:
+        breakdowns = compute_breakdowns(df)
+
     print("=" * 60)
     print("MODEL VALIDATION")
     print("=" * 60)
@@ -32,13 +131,16 @@ def validate_risk_scoring(df):
 
     # Check if volume data exists and is numeric
     if 'spill_volume_gal' in df.columns:
-        # Filter out null/invalid volumes for correlation
-        df_with_volume = df[df['spill_volume_gal'].notna() & (df['spill_volume_gal'] > 0)].copy()
-        if len(df_with_volume) > 0:
-            corr_volume = df_with_volume['risk_score'].corr(df_with_volume['spill_volume_gal'])
+        # Filter out null/invalid volumes for correlation (masks only, no frame copy)
+        volume = df['spill_volume_gal'].to_numpy(dtype=np.float64)
+        valid_volume = ~np.isnan(volume) & (volume > 0)
+        volume_count = int(valid_volume.sum())
+        if volume_count > 0:
+            risk = df['risk_score'].to_numpy(dtype=np.float64)
+            corr_volume = pearson_corr(risk[valid_volume], volume[valid_volume])
             metrics['risk_score_vs_volume'] = round(corr_volume, 4)
             print(f"   Risk Score vs Spill Volume: {corr_volume:.4f}")
-            print(f"   (Based on {len(df_with_volume):,} records with valid volume data)")
+            print(f"   (Based on {volume_count:,} records with valid volume data)")
         else:
             metrics['risk_score_vs_volume'] = None
             print("   Risk Score vs Spill Volume: No valid data")
@@ -52,18 +154,21 @@ def validate_risk_scoring(df):
         print(f"   Note: Found potential water-related columns: {', '.join(water_columns)}")
         # Try first water-related column
         water_col = water_columns[0]
-        df_with_water = df[df[water_col].notna()].copy()
+        df_with_water = df.loc[df[water_col].notna(), ['risk_score', water_col]]
         if len(df_with_water) > 0:
             # Try to convert to numeric if it's Yes/No or similar
             try:
-                if df_with_water[water_col].dtype == 'object':
-                    water_numeric = df_with_water[water_col].map({'Yes': 1, 'No': 0, 'Y': 1, 'N': 0})
-                    if water_numeric.notna().sum() > 0:
-                        corr_water = df_with_water['risk_score'].corr(water_numeric)
-                        metrics['risk_score_vs_water'] = round(corr_water, 4)
-                        print(f"   Risk Score vs {water_col}: {corr_water:.4f}")
+                water_values = df_with_water[water_col]
+                if not pd.api.types.is_numeric_dtype(water_values):
+                    # Vectorized Yes/Y -> 1, No/N -> 0, anything else -> NaN
+                    water_numeric = np.where(water_values.isin(['Yes', 'Y']), 1.0,
+                                             np.where(water_values.isin(['No', 'N']), 0.0, np.nan))
                 else:
-                    corr_water = df_with_water['risk_score'].corr(df_with_water[water_col])
+                    water_numeric = water_values.to_numpy(dtype=np.float64)
+                valid_water = ~np.isnan(water_numeric)
+                if valid_water.sum() > 0:
+                    risk = df_with_water['risk_score'].to_numpy(dtype=np.float64)
+                    corr_water = pearson_corr(risk[valid_water], water_numeric[valid_water])
                     metrics['risk_score_vs_water'] = round(corr_water, 4)
                     print(f"   Risk Score vs {water_col}: {corr_water:.4f}")
             except:
@@ -75,9 +180,7 @@ def validate_risk_scoring(df):
     print("\n2. RISK SCORE DISTRIBUTION BY MATERIAL (Standardized)")
     print("-" * 60)
 
-    # Use standardized material names if available
-    material_col = 'pipe_material_standardized' if 'pipe_material_standardized' in df.columns else 'pipe_material'
-    material_stats = df.groupby(material_col)['risk_score'].agg(['mean', 'count']).sort_values('mean', ascending=False)
+    material_stats = breakdowns.material_stats
     metrics['avg_risk_by_material'] = {}
 
     print(f"   {'Material':<30} {'Avg Risk':<12} {'Count':<10}")
@@ -96,12 +199,7 @@ def validate_risk_scoring(df):
     print("\n3. RISK SCORE DISTRIBUTION BY AGE BAND")
     print("-" * 60)
 
-    # Create age bands
-    df['age_band'] = pd.cut(df['pipe_age_years'],
-                            bins=[0, 30, 50, 70, 90, float('inf')],
-                            labels=['0-30', '31-50', '51-70', '71-90', '90+'])
-
-    age_stats = df.groupby('age_band')['risk_score'].agg(['mean', 'count'])
+    age_stats = breakdowns.age_band_stats
     metrics['avg_risk_by_age_band'] = {}
 
     print(f"   {'Age Band':<15} {'Avg Risk':<12} {'Count':<10}")
@@ -117,8 +215,8 @@ def validate_risk_scoring(df):
     print("\n4. RISK SCORE BY SPILL CAUSE")
     print("-" * 60)
 
-    if 'spill_cause' in df.columns:
-        cause_stats = df.groupby('spill_cause')['risk_score'].agg(['mean', 'count']).sort_values('mean', ascending=False)
+    if breakdowns.cause_stats is not None:
+        cause_stats = breakdowns.cause_stats
         metrics['avg_risk_by_cause'] = {}
 
         print(f"   {'Cause':<30} {'Avg Risk':<12} {'Count':<10}")
@@ -148,9 +246,8 @@ def validate_risk_scoring(df):
             print("   ⚠ Negative/no correlation with spill volume (unexpected)")
 
     # Check age band progression
-    age_band_order = ['0-30', '31-50', '51-70', '71-90', '90+']
-    age_scores = [metrics['avg_risk_by_age_band'].get(band, 0) for band in age_band_order if band in metrics['avg_risk_by_age_band']]
-    if age_scores == sorted(age_scores):
+    age_scores = [metrics['avg_risk_by_age_band'].get(band, 0) for band in AGE_BAND_LABELS if band in metrics['avg_risk_by_age_band']]
+    if np.all(np.diff(age_scores) >= 0):
         print("   ✓ Risk scores increase with pipe age (expected)")
     else:
         print("   ⚠ Risk scores do not consistently increase with age")
@@ -208,21 +305,20 @@ if __name__ == "__main__":
     # Define paths
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     input_file = os.path.join(base_dir, "data", "sso_la_county_analyzed.csv")
-    preprocessed_file = os.path.join(base_dir, "data", "preprocessed_data.csv")
+    preprocessed_file = os.path.join(base_dir, "data", "preprocessed_data.parquet")
     metrics_file = os.path.join(base_dir, "outputs", "model_metrics.json")
 
-    # Load original data to get counts
-    df_original = pd.read_csv(input_file)
-    total_records = len(df_original)
-
     # Check if preprocessed data exists, otherwise create it
     if os.path.exists(preprocessed_file):
         print(f"Loading preprocessed data from: {preprocessed_file}\n")
-        df = pd.read_csv(preprocessed_file)
+        df = load_preprocessed(preprocessed_file)
+        # Only the row count of the original data is needed
+        total_records = count_records(input_file)
     else:
         print("Preprocessed data not found. Running preprocessing...\n")
-        df = preprocess_data(input_file, preprocessed_file)
+        df, total_records = preprocess_data(input_file, preprocessed_file)
 
+    add_age_band(df)
     records_scored = len(df)
     records_missing = total_records - records_scored
 
@@ -5,28 +5,96 @@ Creates risk rankings and comprehensive output files.
 
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pv
 import os
-from preprocess import preprocess_data
+from preprocess import preprocess_data, load_preprocessed, add_age_band
+from model import compute_breakdowns
 
 
-def generate_predictions(df):
+def rank_descending(scores):
+    """
+    Rank scores from highest to lowest, giving tied scores the same (lowest) rank.
+
+    Matches Series.rank(ascending=False, method='min') for NaN-free float
+    scores, but uses a single stable argsort instead of pandas' general
+    ranking machinery.
+
+    Args:
+        scores: 1-D array of risk scores
+
+    Returns:
+        int32 array of ranks (1 = highest score)
+    """
+    scores = np.asarray(scores)
+    order = np.argsort(-scores, kind='stable')
+    sorted_scores = scores[order]
+
+    # Each run of equal scores takes the position of its first member
+    is_new = np.ones(len(scores), dtype=bool)
+    is_new[1:] = sorted_scores[1:] != sorted_scores[:-1]
+    positions = np.arange(1, len(scores) + 1)
+
+    ranks = np.empty(len(scores), dtype=np.int32)
+    ranks[order] = np.maximum.accumulate(np.where(is_new, positions, 0))
+    return ranks
+
+
+def top_n_positions(scores, n):
+    """
+    Positions of the n highest scores, highest first.
+
+    Selects with np.argpartition (O(N)) and sorts only the selected scores,
+    instead of sorting the whole array. Ties are broken by position, the
+    same as DataFrame.nlargest(keep='first').
+
+    Args:
+        scores: 1-D array of risk scores
+        n: Number of positions to return
+
+    Returns:
+        Integer array of at most n positions into scores
+    """
+    scores = np.asarray(scores)
+    n = min(n, len(scores))
+    if n == 0:
+        return np.empty(0, dtype=np.intp)
+
+    # Everything above the n-th largest score, then the earliest ties with it
+    cutoff = scores[np.argpartition(-scores, n - 1)[n - 1]]
+    above = np.flatnonzero(scores > cutoff)
+    ties = np.flatnonzero(scores == cutoff)[:n - len(above)]
+    positions = np.concatenate([above, ties])
+    return positions[np.lexsort((positions, -scores[positions]))]
+
+
+def generate_predictions(df, breakdowns=None):
     """
     Add risk rankings and prepare final output.
 
+    The risk_rank column is added to df in place rather than to a copy, so
+    the full frame is not duplicated in memory.
+
     Args:
-        df: Preprocessed DataFrame with risk scores
+        df: Preprocessed DataFrame with risk scores (modified in place)
+        breakdowns: Precomputed Breakdowns for df (computed if not given)
 
     Returns:
-        DataFrame with rankings added
+        The same DataFrame with rankings added
     """
     print("=" * 60)
     print("GENERATING PREDICTIONS")
     print("=" * 60)
 
+    if breakdowns is None:
+        breakdowns = compute_breakdowns(df)
+
     # Add risk ranking (1 = highest risk)
     print("\n1. Adding risk rankings...")
-    df_output = df.copy()
-    df_output['risk_rank'] = df_output['risk_score'].rank(ascending=False, method='min').astype(int)
+    df_output = df
+    df_output['risk_rank'] = rank_descending(df_output['risk_score'].to_numpy())
+    # Scores live on a 0-100 scale, so float32 is plenty once ranks are fixed
+    df_output['risk_score'] = df_output['risk_score'].astype(np.float32)
     print(f"   ✓ Ranked {len(df_output):,} records")
 
     # Summary statistics
@@ -45,20 +113,18 @@ def generate_predictions(df):
 
     # Average risk by material
     print("\n   Average Risk Score by Material (Standardized, Top 10):")
-    material_col = 'pipe_material_standardized' if 'pipe_material_standardized' in df_output.columns else 'pipe_material'
-    material_avg = df_output.groupby(material_col)['risk_score'].mean().sort_values(ascending=False).head(10)
+    material_avg = breakdowns.material_stats['mean'].head(10)
+    material_cnt = breakdowns.material_stats['count']
     for material, avg_risk in material_avg.items():
-        count = len(df_output[df_output[material_col] == material])
+        count = material_cnt[material]
         print(f"      {str(material)[:30]:>30}: {avg_risk:>6.2f}  (n={count:,})")
 
     # Average risk by age band
     print("\n   Average Risk Score by Age Band:")
-    df_output['age_band'] = pd.cut(df_output['pipe_age_years'],
-                                    bins=[0, 30, 50, 70, 90, float('inf')],
-                                    labels=['0-30', '31-50', '51-70', '71-90', '90+'])
-    age_band_avg = df_output.groupby('age_band')['risk_score'].mean()
+    age_band_avg = breakdowns.age_band_stats['mean']
+    age_band_cnt = breakdowns.age_band_stats['count']
     for band, avg_risk in age_band_avg.items():
-        count = len(df_output[df_output['age_band'] == band])
+        count = age_band_cnt[band]
         print(f"      {str(band):>8}: {avg_risk:>6.2f}  (n={count:,})")
 
     # Top 10 highest risk locations
@@ -71,7 +137,7 @@ def generate_predictions(df):
     has_location = 'location_name' in df_output.columns
 
     if has_lat or has_lon or has_location:
-        top_10 = df_output.nlargest(10, 'risk_score')
+        top_10 = df_output.iloc[top_n_positions(df_output['risk_score'].to_numpy(), 10)]
 
         lat_col = 'latitude_num' if 'latitude_num' in df_output.columns else 'latitude'
         lon_col = 'longitude_num' if 'longitude_num' in df_output.columns else 'longitude'
@@ -130,9 +196,9 @@ def save_results(df, output_path):
     if 'age_band' in output_cols:
         output_cols.remove('age_band')
 
-    # Save to CSV
+    # Save to CSV (Arrow's vectorized writer instead of pandas' per-row formatter)
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    df[output_cols].to_csv(output_path, index=False)
+    pv.write_csv(pa.Table.from_pandas(df[output_cols], preserve_index=False), output_path)
 
     print(f"   ✓ Saved {len(df):,} records")
     print(f"   ✓ {len(output_cols)} columns included")
@@ -167,17 +233,19 @@ if __name__ == "__main__":
     # Define paths
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     input_file = os.path.join(base_dir, "data", "sso_la_county_analyzed.csv")
-    preprocessed_file = os.path.join(base_dir, "data", "preprocessed_data.csv")
+    preprocessed_file = os.path.join(base_dir, "data", "preprocessed_data.parquet")
     results_file = os.path.join(base_dir, "outputs", "model_results.csv")
     importance_file = os.path.join(base_dir, "outputs", "feature_importance.csv")
 
     # Check if preprocessed data exists, otherwise create it
     if os.path.exists(preprocessed_file):
         print(f"Loading preprocessed data from: {preprocessed_file}\n")
-        df = pd.read_csv(preprocessed_file)
+        df = load_preprocessed(preprocessed_file)
     else:
         print("Preprocessed data not found. Running preprocessing...\n")
-        df = preprocess_data(input_file, preprocessed_file)
+        df, _ = preprocess_data(input_file, preprocessed_file)
+
+    add_age_band(df)
 
     # Generate predictions
     df_results = generate_predictions(df)
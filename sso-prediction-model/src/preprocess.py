@@ -26,7 +26,111 @@ ALIGNMENT:
 
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import csv
 import os
+import pickle
+import re
+
+try:
+    from _kernels import score_all
+except ImportError:  # numba not installed: fall back to the NumPy path
+    score_all = None
+
+# Input column dtypes for read_csv. Low-cardinality text columns load
+# straight into categoricals and numeric columns skip type inference.
+# Every column is still read because the Power BI export carries them all;
+# pipe_age_years stays text because it holds values like 'Unknown'. The
+# remaining columns are pinned too so every chunk gets the same dtypes,
+# even when a sparse column is entirely missing within one chunk.
+INPUT_DTYPES = {
+    'wdid': str,
+    'region': 'category',
+    'county': 'category',
+    'spill_type': 'category',
+    'spill_date': str,
+    'spill_volume_gal': 'float64',
+    'spill_cause': str,
+    'pipe_material': 'category',
+    'pipe_age_years': str,
+    'latitude': 'float64',
+    'longitude': 'float64',
+    'location_name': str,
+    'failure_location': 'category',
+    'data_source': 'category',
+    'agency_name': str,
+    'pipe_material_clean': str,
+    'pipe_material_std': str,
+    'pipe_age_numeric': 'float64',
+    'age_group': str,
+    'cause_clean': str,
+    'cause_simplified': str,
+    'volume_numeric': 'float64',
+    'latitude_num': 'float64',
+    'longitude_num': 'float64',
+}
+
+# Age bands used for validation and prediction breakdowns
+AGE_BAND_BINS = [0, 30, 50, 70, 90, np.inf]
+AGE_BAND_LABELS = ['0-30', '31-50', '51-70', '71-90', '90+']
+
+# Upper bounds of the Low/Medium/High risk categories, matching
+# calculate_risk_category() (right-inclusive); anything above is Critical
+RISK_CATEGORY_THRESHOLDS = np.array([40, 60, 80], dtype=np.float32)
+RISK_CATEGORY_LABELS = ['Low', 'Medium', 'High', 'Critical']
+
+# Score columns summarized after preprocessing
+SCORE_COLUMNS = ['age_score', 'material_score', 'risk_score']
+
+# Rows per read_csv chunk; bounds the unfiltered input held in memory
+CHUNK_SIZE = 200_000
+
+# Material name patterns, checked in order by standardize_material_name().
+# Each is one compiled alternation of substrings, plus standalone
+# abbreviations that only count as an exact match (^...$).
+MATERIAL_PATTERNS = [
+    # VCP / Vitrified Clay Pipe variants (includes terra cotta, VC, BCP)
+    (re.compile(r'VCP|VITRIFIED|CLAY|V\.C\.P|TCP|TERRA COTTA|^(?:VC|V\.C\.|BCP)$'), 'VCP'),
+    # Concrete Pipe variants (including CP, C.P., CON, CONC abbreviations)
+    (re.compile(r'CONCRETE|CONC|RCP|NRCP|CMP|^(?:CP|C\.P\.|CON|CONC\.|CEMENT)$'), 'Concrete'),
+    # Cast Iron variants (standalone CI, but not as part of other words)
+    (re.compile(r'CAST IRON|C\.I\.|CIP|^CI$'), 'Cast Iron'),
+    # Ductile Iron (including standalone DI)
+    (re.compile(r'DUCTILE|DIP|D\.I\.P|^DI$'), 'Ductile Iron'),
+    # PVC variants (including C900 standard and ABS plastic)
+    (re.compile(r'PVC|POLYVINYL|PVCP|C900|ABS'), 'PVC'),
+    # HDPE / Plastic variants (including HDP/HPDE typos)
+    (re.compile(r'HDPE|HPDE|POLYETHYLENE|PE|PLASTIC|HDP'), 'HDPE'),
+    # Steel (including generic 'metal')
+    (re.compile(r'STEEL|^METAL$'), 'Steel'),
+    # Brick (including B/C as Brick/Concrete composite)
+    (re.compile(r'BRICK|^B/C$'), 'Brick'),
+    # Asbestos Cement (including Transite brand name)
+    (re.compile(r'ASBESTOS|AC|A/C|TRANSITE'), 'Asbestos Cement'),
+    # Fiberglass (including Techite brand name)
+    (re.compile(r'FIBERGLASS|FRP|TECHITE'), 'Fiberglass'),
+    # Unknown/Other (including UKN, UNK abbreviations and data entry errors)
+    (re.compile(r'UNKNOWN|UKN|UNK|OTHER|N/A|NONE|GREASE|HAIR|BLUEBELL'), 'Unknown'),
+]
+REINFORCED_PATTERN = re.compile(r'RCP|REINFORCED')
+
+# Scores for the canonical names produced by standardize_material_name(),
+# matching calculate_material_score(). Any other name falls back to it.
+MATERIAL_SCORES = {
+    'Cast Iron': 100,
+    'Concrete': 70,
+    'Concrete (Reinforced)': 70,
+    'Steel': 60,
+    'VCP': 50,
+    'Asbestos Cement': 36,
+    'Ductile Iron': 18,
+    'PVC': 10,
+    'HDPE': 10,
+    'Brick': 50,
+    'Fiberglass': 50,
+    'Unknown': 50,
+}
 
 
 def calculate_age_score(age):
@@ -57,6 +161,28 @@ def calculate_age_score(age):
     return min(100, score)
 
 
+def calculate_age_scores(ages):
+    """
+    Vectorized calculate_age_score() over an array of ages.
+
+    Applies the same exponential curve with NumPy ufuncs instead of a
+    Python call per row. Ages <= 0 are clamped to 0, which scores 20.
+
+    Args:
+        ages: Array-like of pipe ages in years
+
+    Returns:
+        float32 array of risk scores from 20-100
+    """
+    ages = np.asarray(ages, dtype=np.float32)
+    scores = np.maximum(ages, np.float32(0))
+    scores /= np.float32(100)
+    scores **= np.float32(1.8)
+    scores *= np.float32(80)
+    scores += np.float32(20)
+    return np.minimum(scores, np.float32(100), out=scores)
+
+
 def calculate_material_score(material):
     """
     Calculate material-based risk score using comprehensive vulnerability analysis.
@@ -110,6 +236,64 @@ def calculate_material_score(material):
     return 50
 
 
+def calculate_material_scores(materials):
+    """
+    Vectorized calculate_material_score() over a column of material names.
+
+    Scores each distinct material once and gathers the result by categorical
+    code, so the string matching runs per category rather than per row.
+
+    Args:
+        materials: Series of standardized material names
+
+    Returns:
+        int8 array of risk scores from 10-100
+    """
+    cat = pd.Categorical(materials)
+    return material_score_table(cat.categories)[cat.codes]
+
+
+def material_score_table(categories):
+    """
+    Build the material score lookup table for a set of categories.
+
+    Canonical names are looked up in MATERIAL_SCORES with Index.map; only
+    names missing from the table go through calculate_material_score().
+
+    Args:
+        categories: Index of standardized material names
+
+    Returns:
+        int8 array of scores indexed by categorical code, with one extra
+        trailing entry so code -1 (missing) reads the unknown score
+    """
+    categories = pd.Index(categories)
+    scores = np.asarray(categories.map(MATERIAL_SCORES), dtype=np.float64)
+    unmapped = np.isnan(scores)
+    scores[unmapped] = [calculate_material_score(c) for c in categories[unmapped]]
+    return np.append(scores, calculate_material_score(np.nan)).astype(np.int8)
+
+
+def calculate_risk_scores(age_scores, material_scores):
+    """
+    Combine age and material scores into the 80/20 weighted risk score.
+
+    Works on raw NumPy arrays and accumulates in place into the output
+    buffer, avoiding the index alignment and intermediate Series created
+    by column arithmetic.
+
+    Args:
+        age_scores: Array of age scores (20-100)
+        material_scores: Array of material scores (10-100)
+
+    Returns:
+        float32 array of combined risk scores
+    """
+    risk_scores = np.multiply(age_scores, np.float32(0.80), dtype=np.float32)
+    risk_scores += np.multiply(material_scores, np.float32(0.20), dtype=np.float32)
+    return risk_scores
+
+
 def calculate_risk_category(risk_score):
     """
     Categorize risk score into bins.
@@ -130,6 +314,24 @@ def calculate_risk_category(risk_score):
         return 'Critical'
 
 
+def calculate_risk_categories(risk_scores):
+    """
+    Vectorized calculate_risk_category() over an array of risk scores.
+
+    A binary search against RISK_CATEGORY_THRESHOLDS yields each category
+    code directly. side='left' keeps the bins right-inclusive, so a score of
+    exactly 40 is still Low.
+
+    Args:
+        risk_scores: Array-like of combined risk scores
+
+    Returns:
+        Ordered Categorical of risk categories
+    """
+    codes = np.searchsorted(RISK_CATEGORY_THRESHOLDS, np.asarray(risk_scores, dtype=np.float32), side='left')
+    return pd.Categorical.from_codes(codes, categories=RISK_CATEGORY_LABELS, ordered=True)
+
+
 def standardize_material_name(material):
     """
     Standardize material names to canonical forms.
@@ -152,70 +354,38 @@ def standardize_material_name(material):
         if material_upper not in ['CI', 'DI', 'AC', 'VC', 'CP']:  # Known valid 2-char codes
             return 'Unknown'
 
-    # VCP / Vitrified Clay Pipe variants (includes terra cotta)
-    if any(x in material_upper for x in ['VCP', 'VITRIFIED', 'CLAY', 'V.C.P', 'TCP', 'TERRA COTTA']):
-        return 'VCP'
-
-    # Handle standalone VC, BCP abbreviations for clay/vitrified pipes
-    if material_upper in ['VC', 'V.C.', 'BCP']:
-        return 'VCP'
+    # First matching pattern wins (see MATERIAL_PATTERNS for precedence)
+    for pattern, name in MATERIAL_PATTERNS:
+        if pattern.search(material_upper):
+            if name == 'Concrete' and REINFORCED_PATTERN.search(material_upper):
+                return 'Concrete (Reinforced)'
+            return name
 
-    # Concrete Pipe variants (including CP, C.P., CON, CONC abbreviations)
-    if any(x in material_upper for x in ['CONCRETE', 'CONC', 'RCP', 'NRCP', 'CMP']):
-        if 'RCP' in material_upper or 'REINFORCED' in material_upper:
-            return 'Concrete (Reinforced)'
-        return 'Concrete'
-
-    # Handle standalone abbreviations for Concrete Pipe
-    if material_upper in ['CP', 'C.P.', 'CON', 'CONC.', 'CEMENT']:
-        return 'Concrete'
-
-    # Cast Iron variants
-    if any(x in material_upper for x in ['CAST IRON', 'C.I.', 'CIP']):
-        return 'Cast Iron'
-
-    # Handle standalone CI abbreviation (but not as part of other words)
-    if material_upper == 'CI':
-        return 'Cast Iron'
-
-    # Ductile Iron
-    if any(x in material_upper for x in ['DUCTILE', 'DIP', 'D.I.P']):
-        return 'Ductile Iron'
-
-    # Handle standalone DI abbreviation for Ductile Iron
-    if material_upper == 'DI':
-        return 'Ductile Iron'
-
-    # PVC variants (including C900 standard and ABS plastic)
-    if any(x in material_upper for x in ['PVC', 'POLYVINYL', 'PVCP', 'C900', 'ABS']):
-        return 'PVC'
-
-    # HDPE / Plastic variants (including HDP/HPDE typos)
-    if any(x in material_upper for x in ['HDPE', 'HPDE', 'POLYETHYLENE', 'PE', 'PLASTIC', 'HDP']):
-        return 'HDPE'
+    # If no match, return original (capitalized)
+    return str(material).strip()
 
-    # Steel (including generic 'metal')
-    if 'STEEL' in material_upper or material_upper == 'METAL':
-        return 'Steel'
 
-    # Brick (including B/C as Brick/Concrete composite)
-    if 'BRICK' in material_upper or material_upper == 'B/C':
-        return 'Brick'
+def standardize_material_names(materials):
+    """
+    Vectorized standardize_material_name() over a column of raw materials.
 
-    # Asbestos Cement (including Transite brand name)
-    if any(x in material_upper for x in ['ASBESTOS', 'AC', 'A/C', 'TRANSITE']):
-        return 'Asbestos Cement'
+    The column has only a few hundred distinct spellings, so each distinct
+    value is standardized once and the results are gathered back by code.
 
-    # Fiberglass (including Techite brand name)
-    if any(x in material_upper for x in ['FIBERGLASS', 'FRP', 'TECHITE']):
-        return 'Fiberglass'
+    Args:
+        materials: Series of raw material strings (may contain NaN)
 
-    # Unknown/Other (including UKN, UNK abbreviations and data entry errors)
-    if any(x in material_upper for x in ['UNKNOWN', 'UKN', 'UNK', 'OTHER', 'N/A', 'NONE', 'GREASE', 'HAIR', 'BLUEBELL']):
-        return 'Unknown'
+    Returns:
+        Categorical of standardized material names (categories sorted)
+    """
+    codes, uniques = pd.factorize(materials)
+    canonical = [standardize_material_name(m) for m in uniques]
+    canonical.append(standardize_material_name(np.nan))  # Code -1 (missing) reads the last entry
 
-    # If no match, return original (capitalized)
-    return str(material).strip()
+    # Several raw spellings share a canonical name, so factorize again for
+    # the (unique) categories
+    canonical_codes, categories = pd.factorize(np.array(canonical, dtype=object), sort=True)
+    return pd.Categorical.from_codes(canonical_codes[codes], categories=categories)
 
 
 def fix_pipe_age(row):
@@ -263,113 +433,373 @@ def fix_pipe_age(row):
     return age
 
 
+def add_age_band(df):
+    """
+    Add the categorical age_band column used by the risk breakdowns.
+
+    Computed once per pipeline run so validation and prediction share it.
+
+    Args:
+        df: DataFrame with pipe_age_years (modified in place)
+
+    Returns:
+        The same DataFrame with age_band added
+    """
+    df['age_band'] = pd.cut(df['pipe_age_years'], bins=AGE_BAND_BINS, labels=AGE_BAND_LABELS)
+    return df
+
+
+def count_records(input_path):
+    """
+    Count data records in a CSV file without loading it into a DataFrame.
+
+    Uses the csv module so quoted fields containing newlines are counted
+    as a single record, matching what pd.read_csv would return.
+
+    Args:
+        input_path: Path to CSV file
+
+    Returns:
+        Number of records, excluding the header row
+    """
+    with open(input_path, newline='') as f:
+        return max(sum(1 for _ in csv.reader(f)) - 1, 0)
+
+
+def fix_pipe_ages(ages, spill_years):
+    """
+    Vectorized fix_pipe_age() over whole columns.
+
+    Applies the same installation-year and months-to-years corrections
+    with boolean masks instead of a Python call per row.
+
+    Args:
+        ages: Array of pipe ages (may contain NaN)
+        spill_years: Array of spill years aligned with ages (NaN if unknown)
+
+    Returns:
+        float64 array of corrected ages in years
+    """
+    ages = np.asarray(ages, dtype=np.float64)
+    fixed = ages.copy()
+
+    # Age > 1800: installation year -> spill year minus installation year
+    calculated_age = np.asarray(spill_years, dtype=np.float64) - ages
+    is_year = (ages > 1800) & (calculated_age > 0) & (calculated_age <= 150)
+    fixed[is_year] = calculated_age[is_year]
+
+    # 150 < age < 1800: entered in months -> divide by 12
+    age_in_years = ages / 12
+    is_months = (ages > 150) & (ages < 1800) & (age_in_years > 0) & (age_in_years <= 150)
+    fixed[is_months] = age_in_years[is_months]
+
+    # Anything else is returned as-is (will likely be filtered out)
+    return fixed
+
+
+def score_records(df):
+    """
+    Add age_score, material_score, risk_score and risk_category columns.
+
+    Uses the compiled kernel when numba is available, otherwise the
+    vectorized NumPy functions above.
+
+    Args:
+        df: Filtered DataFrame with numeric pipe_age_years and a categorical
+            pipe_material_standardized column (modified in place)
+    """
+    if score_all is not None:
+        # One compiled pass over ages and material codes
+        materials = pd.Categorical(df['pipe_material_standardized'])
+        age_scores, material_scores, risk_scores, category_codes = score_all(
+            df['pipe_age_years'].to_numpy(np.float32),
+            materials.codes,
+            material_score_table(materials.categories))
+        df['age_score'] = age_scores
+        df['material_score'] = material_scores
+        df['risk_score'] = risk_scores
+        df['risk_category'] = pd.Categorical.from_codes(category_codes, categories=RISK_CATEGORY_LABELS,
+                                                        ordered=True)
+    else:
+        df['age_score'] = calculate_age_scores(df['pipe_age_years'])
+        df['material_score'] = calculate_material_scores(df['pipe_material_standardized'])
+        df['risk_score'] = calculate_risk_scores(df['age_score'].to_numpy(),
+                                                 df['material_score'].to_numpy())
+        df['risk_category'] = calculate_risk_categories(df['risk_score'])
+
+
+def concat_chunks(chunks):
+    """
+    Concatenate scored chunks, keeping categorical columns categorical.
+
+    Each chunk infers its own categories, and pd.concat falls back to
+    object dtype when they differ, so unordered categoricals are first
+    recast to the (sorted) union of their categories.
+
+    Args:
+        chunks: List of DataFrames with identical columns
+
+    Returns:
+        Single DataFrame with the original row index preserved
+    """
+    if len(chunks) == 1:
+        return chunks[0]
+
+    for col in chunks[0].select_dtypes('category').columns:
+        if chunks[0][col].cat.ordered:
+            continue  # Fixed categories (risk_category) already match
+        categories = chunks[0][col].cat.categories
+        for chunk in chunks[1:]:
+            categories = categories.union(chunk[col].cat.categories)
+        dtype = pd.CategoricalDtype(categories)
+        for chunk in chunks:
+            chunk[col] = chunk[col].astype(dtype)
+
+    return pd.concat(chunks)
+
+
+def parquet_schema(schema):
+    """
+    Arrow schema used for every chunk written to the Parquet output.
+
+    pandas picks the narrowest integer type for categorical codes, so the
+    same column can arrive as int8 in one chunk and int16 in the next.
+    Dictionary indices are widened to int32 so all row groups match, and
+    text columns that are entirely missing in the first chunk (typed null)
+    are written as strings.
+
+    Args:
+        schema: Arrow schema of the first chunk
+
+    Returns:
+        Arrow schema with int32 dictionary indices
+    """
+    def widen(arrow_type):
+        if pa.types.is_dictionary(arrow_type):
+            return pa.dictionary(pa.int32(), widen(arrow_type.value_type), arrow_type.ordered)
+        return pa.string() if pa.types.is_null(arrow_type) else arrow_type
+
+    return pa.schema([pa.field(f.name, widen(f.type)) for f in schema], metadata=schema.metadata)
+
+
+def load_preprocessed(path):
+    """
+    Load preprocessed data written by preprocess_data().
+
+    Args:
+        path: Path to a .parquet file, or a .csv file for the text format
+
+    Returns:
+        DataFrame of preprocessed data with scores
+    """
+    if path.endswith('.csv'):
+        return pd.read_csv(path, engine='pyarrow')
+    return pd.read_parquet(path)
+
+
+def build_summary(df):
+    """
+    Summary statistics reported by validate_model.py.
+
+    Args:
+        df: Scored DataFrame (preprocessed data or model results)
+
+    Returns:
+        Dict with the record count, risk category counts, per-material
+        risk/age aggregates, and describe() of risk_score and pipe_age_years
+    """
+    return {
+        'record_count': len(df),
+        'category_counts': df['risk_category'].value_counts(),
+        'material_stats': df.groupby('pipe_material_standardized', observed=True).agg({
+            'risk_score': ['mean', 'count'],
+            'pipe_age_years': 'mean'
+        }),
+        'risk_describe': df['risk_score'].describe(),
+        'age_describe': df['pipe_age_years'].describe(),
+    }
+
+
 def preprocess_data(input_path, output_path=None):
     """
     Load, filter, and score SSO data.
 
+    The input is read CHUNK_SIZE rows at a time. Each chunk is fixed,
+    filtered and scored on its own and appended to output_path, and the
+    summary statistics are accumulated across chunks, so the unfiltered
+    input is never held in memory all at once.
+
+    Output is written as Parquet (one row group per chunk), which keeps the
+    float32/categorical dtypes and is much faster to write than text. A
+    path ending in .csv writes CSV instead. The statistics validate_model.py
+    reports are pickled next to it as <output_path>.summary.pkl.
+
     Args:
         input_path: Path to input CSV file
         output_path: Path to save preprocessed data (optional)
 
     Returns:
-        Preprocessed DataFrame with scores
+        Tuple of (preprocessed DataFrame with scores, initial record count)
     """
     print("=" * 60)
     print("PREPROCESSING SSO DATA")
     print("=" * 60)
 
-    # Load data
     print(f"\n1. Loading data from: {input_path}")
-    df = pd.read_csv(input_path)
-    initial_count = len(df)
-    print(f"   Initial records: {initial_count:,}")
+    if output_path:
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
-    # Convert pipe_age_years to numeric (handle any string values)
-    df['pipe_age_years'] = pd.to_numeric(df['pipe_age_years'], errors='coerce')
+    # Running totals for the summary printed after the last chunk
+    initial_count = 0
+    ages_needing_fix = 0
+    ages_fixed = 0
+    null_ages = 0
+    null_materials = 0
+    raw_materials = set()
+    standardized_materials = set()
+    score_stats = []  # Per-chunk min/max/sum of the score columns
+    category_counts = np.zeros(len(RISK_CATEGORY_LABELS), dtype=np.int64)
+    material_counts = pd.Series(dtype=np.int64)
+    chunks = []
+    write_csv = bool(output_path) and output_path.endswith('.csv')
+    parquet_writer = None
+
+    reader = pd.read_csv(input_path, dtype=INPUT_DTYPES, chunksize=CHUNK_SIZE)
+    try:
+        for df in reader:
+            first_chunk = not chunks
+            initial_count += len(df)
+
+            # Convert pipe_age_years to numeric (handle any string values)
+            df['pipe_age_years'] = pd.to_numeric(df['pipe_age_years'], errors='coerce')
+
+            # Fix pipe ages (installation years -> actual ages). The raw ages
+            # are only needed to count corrections, so keep them as a local
+            # array rather than an extra column.
+            ages_before = df['pipe_age_years'].to_numpy()
+            needs_year = ages_before > 1800
+            chunk_needing_fix = int(needs_year.sum())
+            ages_needing_fix += chunk_needing_fix
+
+            # Applied to every chunk so month-entered ages are corrected even in
+            # chunks without installation years
+            spill_years = np.full(len(df), np.nan)
+            if chunk_needing_fix > 0:
+                # Only installation-year rows use the spill year, so parse just those dates
+                spill_years[needs_year] = (pd.to_datetime(df['spill_date'][needs_year], errors='coerce')
+                                           .dt.year.to_numpy(dtype=np.float64, na_value=np.nan))
+            ages_after = fix_pipe_ages(ages_before, spill_years)
+            ages_fixed += (ages_after != ages_before).sum()
+            df['pipe_age_years'] = ages_after
+
+            # Standardize material names
+            raw_materials.update(df['pipe_material'].dropna().unique())
+            df['pipe_material_standardized'] = standardize_material_names(df['pipe_material'])
+            standardized_materials.update(df['pipe_material_standardized'].dropna().unique())
+
+            # Filter null values. Boolean indexing already returns new data, so
+            # skip the extra .copy() and release the unfiltered chunk.
+            null_ages += df['pipe_age_years'].isna().sum()
+            null_materials += df['pipe_material'].isna().sum()
+            keep = df['pipe_age_years'].notna() & df['pipe_material'].notna()
+            df_chunk = df.loc[keep]
+            del df
+            df_chunk['pipe_material_standardized'] = df_chunk['pipe_material_standardized'].cat.remove_unused_categories()
+
+            # Calculate scores
+            score_records(df_chunk)
+
+            score_stats.append(df_chunk[SCORE_COLUMNS].agg(['min', 'max', 'sum']))
+            category_counts += np.bincount(df_chunk['risk_category'].cat.codes,
+                                           minlength=len(RISK_CATEGORY_LABELS))
+            material_counts = material_counts.add(df_chunk['pipe_material_standardized'].value_counts(sort=False),
+                                                  fill_value=0)
+
+            # Append to the output so the scored rows are written as they arrive
+            if write_csv:
+                df_chunk.to_csv(output_path, mode='w' if first_chunk else 'a', header=first_chunk, index=False)
+            elif output_path:
+                table = pa.Table.from_pandas(df_chunk, preserve_index=False)
+                if parquet_writer is None:
+                    parquet_writer = pq.ParquetWriter(output_path, parquet_schema(table.schema))
+                parquet_writer.write_table(table.cast(parquet_writer.schema))
+
+            chunks.append(df_chunk)
+    finally:
+        if parquet_writer is not None:
+            parquet_writer.close()
+
+    df_filtered = concat_chunks(chunks)
+    filtered_count = len(df_filtered)
+
+    print(f"   Initial records: {initial_count:,}")
 
     # Data Quality Fixes
     print("\n2. Applying data quality fixes...")
-
-    # Fix pipe ages (installation years -> actual ages)
-    ages_before = df['pipe_age_years'].copy()
-    ages_needing_fix = df[df['pipe_age_years'] > 1800].shape[0]
     print(f"   Ages that appear to be installation years (>1800): {ages_needing_fix:,}")
-
     if ages_needing_fix > 0:
-        df['pipe_age_years_original'] = df['pipe_age_years']
-        df['pipe_age_years'] = df.apply(fix_pipe_age, axis=1)
-        ages_fixed = (df['pipe_age_years'] != ages_before).sum()
         print(f"   Ages successfully corrected: {ages_fixed:,}")
 
-    # Standardize material names
-    materials_before = df['pipe_material'].nunique()
-    df['pipe_material_original'] = df['pipe_material']
-    df['pipe_material_standardized'] = df['pipe_material'].apply(standardize_material_name)
-    materials_after = df['pipe_material_standardized'].nunique()
-
+    materials_before = len(raw_materials)
+    materials_after = len(standardized_materials)
     print(f"   Material variants before standardization: {materials_before:,}")
     print(f"   Material types after standardization: {materials_after:,}")
     print(f"   Reduction: {materials_before - materials_after:,} variants consolidated")
 
-    # Filter null values
     print("\n3. Filtering records...")
-    print(f"   Records with null pipe_age_years: {df['pipe_age_years'].isna().sum():,}")
-    print(f"   Records with null pipe_material: {df['pipe_material'].isna().sum():,}")
-
-    df_filtered = df[df['pipe_age_years'].notna() & df['pipe_material'].notna()].copy()
-    filtered_count = len(df_filtered)
+    print(f"   Records with null pipe_age_years: {null_ages:,}")
+    print(f"   Records with null pipe_material: {null_materials:,}")
     print(f"   Records after filtering: {filtered_count:,}")
     print(f"   Records removed: {initial_count - filtered_count:,}")
 
-    # Calculate scores
-    print("\n4. Calculating risk scores...")
-    df_filtered['age_score'] = df_filtered['pipe_age_years'].apply(calculate_age_score)
-    df_filtered['material_score'] = df_filtered['pipe_material_standardized'].apply(calculate_material_score)
-    df_filtered['risk_score'] = (df_filtered['age_score'] * 0.80) + (df_filtered['material_score'] * 0.20)
-    df_filtered['risk_category'] = df_filtered['risk_score'].apply(calculate_risk_category)
-
     # Summary statistics
-    print(f"   Age scores - Min: {df_filtered['age_score'].min():.1f}, "
-          f"Max: {df_filtered['age_score'].max():.1f}, "
-          f"Mean: {df_filtered['age_score'].mean():.1f}")
-    print(f"   Material scores - Min: {df_filtered['material_score'].min():.1f}, "
-          f"Max: {df_filtered['material_score'].max():.1f}, "
-          f"Mean: {df_filtered['material_score'].mean():.1f}")
-    print(f"   Risk scores - Min: {df_filtered['risk_score'].min():.1f}, "
-          f"Max: {df_filtered['risk_score'].max():.1f}, "
-          f"Mean: {df_filtered['risk_score'].mean():.1f}")
+    print("\n4. Calculating risk scores...")
+    totals = pd.concat(score_stats)
+    stats = pd.DataFrame({'min': totals.loc[['min']].min(),
+                          'max': totals.loc[['max']].max(),
+                          'mean': totals.loc[['sum']].sum() / filtered_count}).T
+    print(f"   Age scores - Min: {stats.loc['min', 'age_score']:.1f}, "
+          f"Max: {stats.loc['max', 'age_score']:.1f}, "
+          f"Mean: {stats.loc['mean', 'age_score']:.1f}")
+    print(f"   Material scores - Min: {stats.loc['min', 'material_score']:.1f}, "
+          f"Max: {stats.loc['max', 'material_score']:.1f}, "
+          f"Mean: {stats.loc['mean', 'material_score']:.1f}")
+    print(f"   Risk scores - Min: {stats.loc['min', 'risk_score']:.1f}, "
+          f"Max: {stats.loc['max', 'risk_score']:.1f}, "
+          f"Mean: {stats.loc['mean', 'risk_score']:.1f}")
 
     print("\n5. Risk category distribution:")
-    category_dist = df_filtered['risk_category'].value_counts().sort_index()
-    for category, count in category_dist.items():
+    for category, count in zip(RISK_CATEGORY_LABELS, category_counts):
         pct = (count / filtered_count) * 100
         print(f"   {category}: {count:,} ({pct:.1f}%)")
 
     print("\n6. Standardized material distribution (top 10):")
-    material_dist = df_filtered['pipe_material_standardized'].value_counts().head(10)
+    material_dist = material_counts.astype(np.int64).sort_values(ascending=False).head(10)
     for material, count in material_dist.items():
         pct = (count / filtered_count) * 100
         print(f"   {material:30} {count:>6,} ({pct:>5.1f}%)")
 
-    # Save if output path provided
     if output_path:
-        print(f"\n7. Saving preprocessed data to: {output_path}")
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        df_filtered.to_csv(output_path, index=False)
+        print(f"\n7. Saved preprocessed data to: {output_path}")
         print("   ✓ Saved successfully")
 
+        summary_path = output_path + '.summary.pkl'
+        with open(summary_path, 'wb') as f:
+            pickle.dump(build_summary(df_filtered), f)
+        print(f"   ✓ Summary saved to: {summary_path}")
+
     print("\n" + "=" * 60)
     print("PREPROCESSING COMPLETE")
     print("=" * 60 + "\n")
 
-    return df_filtered
+    return df_filtered, initial_count
 
 
 if __name__ == "__main__":
     # Define paths
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     input_file = os.path.join(base_dir, "data", "sso_la_county_analyzed.csv")
-    output_file = os.path.join(base_dir, "data", "preprocessed_data.csv")
+    output_file = os.path.join(base_dir, "data", "preprocessed_data.parquet")
 
     # Run preprocessing
-    df = preprocess_data(input_file, output_file)
+    df, _ = preprocess_data(input_file, output_file)